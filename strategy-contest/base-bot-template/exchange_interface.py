@@ -6,7 +6,7 @@ from __future__ import annotations
 import random
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Callable, Dict, List, Protocol
+from typing import Callable, Dict, List, Optional, Protocol
 
 
 @dataclass
@@ -17,6 +17,7 @@ class MarketSnapshot:
     prices: List[float]
     current_price: float
     timestamp: datetime
+    sma: Optional[float] = None  # Precomputed moving average, if the feed provides one
 
     @property
     def history(self) -> List[float]:
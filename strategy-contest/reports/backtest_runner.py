@@ -1,8 +1,12 @@
 import sys
 import os
+import numpy as np
 import pandas as pd
 import yfinance as yf
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 import statistics
 
 # Add base-bot-template to path
@@ -17,13 +21,24 @@ sys.path.insert(0, strategy_path)
 
 from strategy_interface import BaseStrategy, Signal, Portfolio
 from exchange_interface import MarketSnapshot, TradeExecution, Exchange
-from your_strategy import SwingReversionStrategy
+from your_strategy import SwingReversionStrategy, BUY, SELL
+
+def _to_datetime(ts: np.datetime64) -> datetime:
+    """Naive UTC datetime for a datetime64 bar timestamp, for APIs typed as datetime."""
+    return ts.astype('datetime64[us]').item()
 
 class BacktestExchange:
-    def __init__(self, data: pd.DataFrame):
-        self.data = data
+    def __init__(self, closes: np.ndarray, timestamps: np.ndarray, sma: np.ndarray):
+        # Plain numpy arrays: per-bar access avoids pandas indexing overhead.
+        # Snapshot timestamps are therefore np.datetime64 (UTC), not datetime;
+        # fills are converted with _to_datetime where the API expects datetime.
+        self.closes = closes
+        self.timestamps = timestamps
+        self.sma = sma
         self.current_idx = 0
         self.name = "backtest"
+        # One snapshot reused for every bar; callers must not keep it across calls
+        self._snap = MarketSnapshot(symbol="", prices=closes[:0], current_price=0.0, timestamp=None)
         
     def fetch_market_snapshot(self, symbol: str, *, limit: int) -> MarketSnapshot:
         # Return data up to current_idx
@@ -32,32 +47,47 @@ class BacktestExchange:
         end_idx = self.current_idx + 1
         start_idx = max(0, end_idx - limit)
         
-        slice_df = self.data.iloc[start_idx:end_idx]
-        prices = slice_df['Close'].tolist()
-        current_price = prices[-1]
-        timestamp = slice_df.index[-1]
-        
-        return MarketSnapshot(
-            symbol=symbol,
-            prices=prices,
-            current_price=current_price,
-            timestamp=timestamp
-        )
+        snap = self._snap
+        snap.symbol = symbol
+        snap.prices = self.closes[start_idx:end_idx]  # View into the close array, no copy
+        snap.current_price = float(self.closes[self.current_idx])
+        snap.timestamp = self.timestamps[self.current_idx]
+        snap.sma = float(self.sma[self.current_idx])
+        return snap
 
     def execute_trade(self, symbol: str, side: str, size: float, price: float) -> TradeExecution:
         # In backtest, we assume execution at the requested price (or close price)
         # For simplicity, use the price passed (which usually comes from current market snapshot)
-        timestamp = self.data.index[self.current_idx]
+        timestamp = _to_datetime(self.timestamps[self.current_idx])
         return TradeExecution(side=side, size=size, price=price, timestamp=timestamp)
 
-def run_backtest():
-    # 1. Download Data
+# Contest period: Jan-Jun 2024
+SYMBOL = "BTC-USD"
+START_DATE = "2024-01-01"
+END_DATE = "2024-06-30"
+STARTING_CASH = 10000.0
+
+DEFAULT_CONFIG = {
+    "ma_period": 24,
+    "grid_step_pct": 0.01,
+    "max_grid_levels": 2,
+    "position_size_pct": 0.275,
+    "stop_loss_pct": 0.15,
+    "take_profit_above_sma_pct": 0.50,
+    "trailing_stop_activation_pct": 0.025,
+    "trailing_stop_callback_pct": 0.035
+}
+
+CACHE_DIR = Path("reports/cache")
+
+def load_price_data(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """Hourly candles for symbol, served from a local Parquet cache after the first download."""
+    cache = CACHE_DIR / f"{symbol}_1h_{start_date}_{end_date}.parquet"
+    if cache.exists():
+        print(f"Loading cached data from {cache}...")
+        return pd.read_parquet(cache)
+
     print("Downloading data...")
-    # Contest period: Jan-Jun 2024
-    start_date = "2024-01-01"
-    end_date = "2024-06-30"
-    symbol = "BTC-USD"
-    
     df = yf.download(symbol, start=start_date, end=end_date, interval="1h")
     
     if isinstance(df.columns, pd.MultiIndex):
@@ -66,117 +96,196 @@ def run_backtest():
         except:
             pass
 
-    if df.empty:
-        print("No data downloaded!")
-        return
+    if not df.empty:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(cache)
+    return df
 
-    print(f"Downloaded {len(df)} candles.")
-    print("Columns:", df.columns)
-    print(df.head())
+def run_backtest(df: pd.DataFrame, config: Dict[str, Any], symbol: str = SYMBOL) -> Dict[str, Any]:
+    """Run one strategy config over the candles in df and return its summary stats."""
+    # 1. Setup
+    # Convert once up front; the loop below only touches numpy arrays.
+    # A tz-aware index would otherwise come back as an object array of
+    # pandas Timestamps, so pin it to UTC datetime64.
+    # Market data is held as float32 (ample for ratio signals on ~6
+    # significant-figure prices); cash and equity stay float64.
+    closes = df['Close'].to_numpy(dtype=np.float32)
+    timestamps = df.index.to_numpy(dtype='datetime64[ns]')
 
-    # 2. Setup
-    exchange = BacktestExchange(df)
-    config = {
-        "ma_period": 24,
-        "grid_step_pct": 0.01,
-        "max_grid_levels": 2,
-        "position_size_pct": 0.275,
-        "stop_loss_pct": 0.15,
-        "take_profit_above_sma_pct": 0.50,
-        "trailing_stop_activation_pct": 0.025,
-        "trailing_stop_callback_pct": 0.035
-    }
-    
-    strategy = SwingReversionStrategy(config, exchange)
-    
-    portfolio = Portfolio(symbol=symbol, cash=10000.0, quantity=0.0)
+    # The strategy is built first so the SMA window below comes from it, with
+    # the same defaults and int coercion the kernel uses; the exchange, which
+    # needs that SMA series, is attached once it exists.
+    strategy = SwingReversionStrategy(config, None)
+
+    # Whole SMA series in one O(N) pass instead of a mean per bar
+    ma_period = strategy.ma_period
+    sma_arr = pd.Series(closes).rolling(ma_period).mean().to_numpy(dtype=np.float32)
+    exchange = BacktestExchange(closes, timestamps, sma_arr)
+    strategy.exchange = exchange
     
-    trades = []
-    equity_curve = []
+    portfolio = Portfolio(symbol=symbol, cash=STARTING_CASH, quantity=0.0)
     
-    # 3. Loop
-    # We need enough history for MA (50 periods)
-    start_idx = 50
+    # 2. Loop
+    # We need enough history for MA (at least 50 periods). The rolling SMA is
+    # first valid at index ma_period - 1; earlier bars can only hold, so the
+    # loop doesn't visit them at all
+    start_idx = max(50, ma_period - 1)
+    # A frame shorter than the warmup leaves nothing to trade (zero bars)
+    n_bars = max(0, len(closes) - start_idx)
+    equity_curve = np.empty(n_bars, dtype=np.float64)
+
+    # Columnar trade log, at most one fill per bar
+    trade_idx = np.empty(n_bars, dtype=np.int32)
+    trade_side = np.empty(n_bars, dtype='U4')
+    trade_price = np.empty(n_bars, dtype=np.float64)
+    trade_size = np.empty(n_bars, dtype=np.float64)
+    n_trades = 0
     
-    for i in range(start_idx, len(df)):
+    # Iterate pre-widened Python floats (so fills and equity accumulate in
+    # float64) rather than indexing numpy scalars out of the arrays per bar
+    bar_prices = closes[start_idx:].tolist()
+
+    # Cash and quantity live in locals; portfolio is only written on fills,
+    # which is the only time the strategy would see it change
+    cash = portfolio.cash
+    qty = portfolio.quantity
+    for i, current_price, timestamp in zip(range(start_idx, len(closes)), bar_prices, timestamps[start_idx:]):
         exchange.current_idx = i
-        current_price = df['Close'].iloc[i]
-        timestamp = df.index[i]
         
         # Get Signal
-        # We need to pass enough history. 
-        # fetch_market_snapshot handles this if we ask for enough.
-        # Strategy asks for history? No, strategy uses market.prices.
-        # We should ensure market.prices has at least ma_period.
-        
-        market = exchange.fetch_market_snapshot(symbol, limit=100)
-        signal = strategy.generate_signal(market, portfolio)
+        # The snapshot carries the precomputed SMA, so the strategy needs no
+        # price history beyond the current bar.
+        market = exchange.fetch_market_snapshot(symbol, limit=1)
+        action, size = strategy.generate_signal_fast(market, portfolio)
         
-        if signal.action == "buy":
-            cost = signal.size * current_price
-            if portfolio.cash >= cost:
-                portfolio.cash -= cost
-                portfolio.quantity += signal.size
-                trades.append({
-                    "timestamp": timestamp,
-                    "side": "buy",
-                    "price": current_price,
-                    "size": signal.size,
-                    "cost": cost
-                })
-                strategy.on_trade(signal, current_price, signal.size, timestamp)
+        # Signal objects are only built for the (rare) fills, for on_trade
+        if action == BUY:
+            cost = size * current_price
+            if cash >= cost:
+                cash -= cost
+                qty += size
+                portfolio.cash, portfolio.quantity = cash, qty
+                trade_idx[n_trades] = i
+                trade_side[n_trades] = "buy"
+                trade_price[n_trades] = current_price
+                trade_size[n_trades] = size
+                n_trades += 1
+                strategy.on_trade(Signal("buy", size=size), current_price, size, _to_datetime(timestamp))
                 
-        elif signal.action == "sell":
-            if portfolio.quantity >= signal.size:
-                revenue = signal.size * current_price
-                portfolio.cash += revenue
-                portfolio.quantity -= signal.size
-                trades.append({
-                    "timestamp": timestamp,
-                    "side": "sell",
-                    "price": current_price,
-                    "size": signal.size,
-                    "revenue": revenue
-                })
-                strategy.on_trade(signal, current_price, signal.size, timestamp)
+        elif action == SELL:
+            if qty >= size:
+                revenue = size * current_price
+                cash += revenue
+                qty -= size
+                portfolio.cash, portfolio.quantity = cash, qty
+                trade_idx[n_trades] = i
+                trade_side[n_trades] = "sell"
+                trade_price[n_trades] = current_price
+                trade_size[n_trades] = size
+                n_trades += 1
+                strategy.on_trade(Signal("sell", size=size), current_price, size, _to_datetime(timestamp))
 
         # Track Equity
-        equity = portfolio.value(current_price)
-        equity_curve.append(equity)
+        equity_curve[i - start_idx] = cash + qty * current_price
 
-    # 4. Report
-    final_equity = equity_curve[-1]
-    pnl = final_equity - 10000.0
-    pnl_pct = (pnl / 10000.0) * 100
+    trades = pd.DataFrame({
+        "timestamp": timestamps[trade_idx[:n_trades]],
+        "side": trade_side[:n_trades],
+        "price": trade_price[:n_trades],
+        "size": trade_size[:n_trades],
+    })
+
+    # 3. Stats
+    if n_bars == 0:
+        # Never left warmup: flat at starting cash
+        final_equity = STARTING_CASH
+        max_drawdown = 0.0
+    else:
+        final_equity = equity_curve[-1]
+
+        # Calculate Drawdown (running peak includes the starting capital)
+        peaks = np.maximum.accumulate(np.concatenate([[STARTING_CASH], equity_curve]))[1:]
+        max_drawdown = ((peaks - equity_curve) / peaks).max()
+    pnl = final_equity - STARTING_CASH
+    pnl_pct = (pnl / STARTING_CASH) * 100
+
+    return {
+        "config": config,
+        "final_equity": final_equity,
+        "pnl": pnl,
+        "pnl_pct": pnl_pct,
+        "max_drawdown": max_drawdown,
+        "trades": trades,
+    }
+
+# Candle frame held by each sweep worker process, set once by _init_sweep_worker
+_sweep_df: Optional[pd.DataFrame] = None
+
+def _init_sweep_worker(df: pd.DataFrame) -> None:
+    global _sweep_df
+    _sweep_df = df
+
+def _run_sweep_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    return run_backtest(_sweep_df, config)
+
+def run_sweep(configs: List[Dict[str, Any]], df: Optional[pd.DataFrame] = None) -> List[Dict[str, Any]]:
+    """
+    Backtest many configs in parallel, one process per worker.
+
+    Each backtest stays sequential; only independent configs are farmed out.
+    The candle frame is handed to each worker once through the pool
+    initializer, so tasks only carry their config.
+    """
+    if df is None:
+        df = load_price_data(SYMBOL, START_DATE, END_DATE)
+    with ProcessPoolExecutor(initializer=_init_sweep_worker, initargs=(df,)) as ex:
+        return list(ex.map(_run_sweep_config, configs))
+
+def main():
+    # 1. Load Data
+    df = load_price_data(SYMBOL, START_DATE, END_DATE)
+
+    if df.empty:
+        print("No data downloaded!")
+        return
+
+    print(f"Loaded {len(df)} candles.")
+    print("Columns:", df.columns)
+    print(df.head())
+
+    # 2. Backtest
+    result = run_backtest(df, DEFAULT_CONFIG)
+    final_equity = result["final_equity"]
+    pnl = result["pnl"]
+    pnl_pct = result["pnl_pct"]
+    max_drawdown = result["max_drawdown"]
+    trades = result["trades"]
     
     print("-" * 40)
     print(f"Backtest Complete")
     print(f"Final Equity: ${final_equity:,.2f}")
     print(f"PnL: ${pnl:,.2f} ({pnl_pct:.2f}%)")
     print(f"Total Trades: {len(trades)}")
-    
-    # Calculate Drawdown
-    peak = 10000.0
-    max_drawdown = 0.0
-    for eq in equity_curve:
-        if eq > peak:
-            peak = eq
-        dd = (peak - eq) / peak
-        if dd > max_drawdown:
-            max_drawdown = dd
-            
     print(f"Max Drawdown: {max_drawdown*100:.2f}%")
     print("-" * 40)
     
-    # Save Report
+    # 3. Save Report
+    # Summary stats as a one-row frame, so new metrics are just new columns
+    stats = pd.DataFrame([{
+        "Symbol": SYMBOL,
+        "Period": f"{START_DATE} to {END_DATE}",
+        "Final Equity ($)": final_equity,
+        "PnL ($)": pnl,
+        "PnL (%)": pnl_pct,
+        "Max Drawdown (%)": max_drawdown * 100,
+        "Total Trades": len(trades),
+    }])
     with open("reports/backtest_report.md", "w") as f:
-        f.write(f"# Backtest Report\n\n")
-        f.write(f"- **Symbol**: {symbol}\n")
-        f.write(f"- **Period**: {start_date} to {end_date}\n")
-        f.write(f"- **Final Equity**: ${final_equity:,.2f}\n")
-        f.write(f"- **PnL**: ${pnl:,.2f} ({pnl_pct:.2f}%)\n")
-        f.write(f"- **Max Drawdown**: {max_drawdown*100:.2f}%\n")
-        f.write(f"- **Total Trades**: {len(trades)}\n")
+        f.write("# Backtest Report\n\n")
+        stats.to_markdown(f, index=False, floatfmt=",.2f")
+        f.write("\n\n## Trades\n\n")
+        trades.to_markdown(f, index=False, floatfmt=("", "", ",.2f", ".6f"))
+        f.write("\n")
 
 if __name__ == "__main__":
-    run_backtest()
+    main()
@@ -1,11 +1,22 @@
 
 import sys
 import os
+import math
 from datetime import datetime, timezone
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from collections import deque
 import statistics
 
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; fall back to plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
 # Add base-bot-template to path
 base_path = os.path.join(os.path.dirname(__file__), '..', 'base-bot-template')
 if not os.path.exists(base_path):
@@ -15,6 +26,91 @@ sys.path.insert(0, base_path)
 from strategy_interface import BaseStrategy, Signal, register_strategy, Portfolio
 from exchange_interface import MarketSnapshot
 
+# Integer action codes used on the hot path (see generate_signal_fast)
+HOLD, BUY, SELL = 0, 1, 2
+
+# Reason codes returned by the _step kernel
+_REASONS = (
+    "",
+    "Trailing Stop Hit",
+    "Mean Reversion: Target Hit",
+    "Position already exists at this level",
+    "Max exposure reached",
+    "Insufficient cash",
+    "Grid Buy Level",
+)
+_NO_REASON, _TRAILING_STOP, _TARGET_HIT, _LEVEL_TAKEN, _MAX_EXPOSURE, _NO_CASH, _GRID_BUY = range(7)
+
+
+@njit(cache=True)
+def _step(current_price: float, sma: float, cash: float, quantity: float, trailing_high: float,
+          pos_prices: np.ndarray, n_pos: int, total_size: float, weighted_sum: float,
+          grid_step_pct: float, max_grid_levels: int, position_size_pct: float,
+          take_profit_above_sma_pct: float, trailing_stop_activation_pct: float,
+          trailing_stop_callback_pct: float) -> Tuple[int, float, int, int, float]:
+    """
+    Scalar decision kernel for one bar.
+
+    Returns (action, size, reason, level_idx, trailing_high). Open positions are
+    passed as an entry-price array with n_pos valid entries, plus their running
+    total size and size-weighted price sum.
+    """
+    deviation = (current_price - sma) / sma
+
+    # Update Trailing High
+    if quantity > 0:
+        trailing_high = max(trailing_high, current_price)  # Branch-free select once compiled
+    else:
+        trailing_high = 0.0
+
+    # 1. Check Sells (Take Profit / Trailing Stop)
+    if quantity > 0:
+        if total_size > 0:
+            avg_entry = weighted_sum / total_size
+
+            # Activate if price > entry * (1 + activation), sell if price < high * (1 - callback)
+            if trailing_high > avg_entry * (1 + trailing_stop_activation_pct):
+                if current_price < trailing_high * (1 - trailing_stop_callback_pct):
+                    return SELL, quantity, _TRAILING_STOP, 0, trailing_high
+
+    # Sell if Price > SMA * (1 + buffer) (Mean Reversion + Profit)
+    if deviation > take_profit_above_sma_pct and quantity > 0:
+        return SELL, quantity, _TARGET_HIT, 0, trailing_high
+
+    # 2. Check Buys (Grid Entry), only below the SMA
+    if deviation < 0:
+        level_idx = int(abs(deviation) / grid_step_pct)
+
+        if level_idx < 1:
+            return HOLD, 0.0, _NO_REASON, 0, trailing_high  # Dead zone just below the SMA
+
+        if level_idx > max_grid_levels:
+            level_idx = max_grid_levels
+
+        # Simple Grid: don't buy if we already hold a position near this price
+        held = pos_prices[:n_pos]
+        if np.any(np.abs(held - current_price) / held < grid_step_pct * 0.5):
+            return HOLD, 0.0, _LEVEL_TAKEN, 0, trailing_high
+
+        # Check Max Exposure (Contest Rule: Max 55%)
+        total_equity = cash + (quantity * current_price)
+        current_exposure = (quantity * current_price) / total_equity
+
+        if current_exposure >= 0.55:
+            return HOLD, 0.0, _MAX_EXPOSURE, 0, trailing_high
+
+        buy_amount_usd = total_equity * position_size_pct
+        if cash < buy_amount_usd:
+            buy_amount_usd = cash
+
+        if buy_amount_usd < 10:  # Min trade size
+            return HOLD, 0.0, _NO_CASH, 0, trailing_high
+
+        return BUY, buy_amount_usd / current_price, _GRID_BUY, level_idx, trailing_high
+
+    return HOLD, 0.0, _NO_REASON, 0, trailing_high
+
+
 class SwingReversionStrategy(BaseStrategy):
     """
     Swing Reversion Grid Strategy
@@ -26,6 +122,20 @@ class SwingReversionStrategy(BaseStrategy):
     - Uses a grid structure to scale in/out.
     """
 
+    ma_period: int
+    grid_step_pct: float
+    max_grid_levels: int
+    position_size_pct: float
+    stop_loss_pct: float
+    take_profit_above_sma_pct: float
+    trailing_stop_activation_pct: float
+    trailing_stop_callback_pct: float
+
+    pos_prices: np.ndarray
+    pos_sizes: np.ndarray
+    n_pos: int
+    trailing_high: float
+
     def __init__(self, config: Dict[str, Any], exchange):
         super().__init__(config=config, exchange=exchange)
         
@@ -38,104 +148,91 @@ class SwingReversionStrategy(BaseStrategy):
         self.take_profit_above_sma_pct = float(config.get("take_profit_above_sma_pct", 0.50)) # Sell when price > SMA * (1 + this)
         self.trailing_stop_activation_pct = float(config.get("trailing_stop_activation_pct", 0.025)) # 2.5% profit to activate
         self.trailing_stop_callback_pct = float(config.get("trailing_stop_callback_pct", 0.035)) # 3.5% drop to sell
+
+        # Kernel parameters bound once, in _step argument order
+        self._step_params = (
+            self.grid_step_pct, self.max_grid_levels, self.position_size_pct,
+            self.take_profit_above_sma_pct, self.trailing_stop_activation_pct,
+            self.trailing_stop_callback_pct,
+        )
         
         # State
-        self.active_positions = [] # List of {'price': float, 'size': float, 'level': int}
+        # Open positions as parallel arrays; only the first n_pos entries are valid
+        self.pos_prices = np.zeros(self.max_grid_levels + 4, dtype=np.float64)
+        self.pos_sizes = np.zeros(self.max_grid_levels + 4, dtype=np.float64)
+        self.n_pos = 0
+        # Running sums maintained on fills, so avg entry is O(1) per bar
+        self._total_size = 0.0
+        self._weighted_sum = 0.0
         self.last_signal_time = None
         self.trailing_high = 0.0
 
     # Redefining logic to be more robust with state
     
     def generate_signal(self, market: MarketSnapshot, portfolio: Portfolio) -> Signal:
-        if len(market.prices) < self.ma_period:
-            return Signal("hold")
+        return self._to_signal(*self._evaluate(market, portfolio))
 
+    def generate_signal_fast(self, market: MarketSnapshot, portfolio: Portfolio) -> Tuple[int, float]:
+        """Same decision as generate_signal, as an (action code, size) pair with no Signal allocation."""
+        action, size, _, _ = self._evaluate(market, portfolio)
+        return action, size
+
+    def _evaluate(self, market: MarketSnapshot, portfolio: Portfolio) -> Tuple[int, float, int, int]:
         current_price = market.current_price
-        sma = statistics.mean(market.prices[-self.ma_period:])
-        deviation = (current_price - sma) / sma
-        
-        # Update Trailing High
-        if portfolio.quantity > 0:
-            if current_price > self.trailing_high:
-                self.trailing_high = current_price
-        else:
-            self.trailing_high = 0.0
-
-        # 1. Check Sells (Take Profit / Trailing Stop)
-        if portfolio.quantity > 0:
-            # Calculate Avg Entry
-            total_size = sum(p['size'] for p in self.active_positions)
-            if total_size > 0:
-                avg_entry = sum(p['price'] * p['size'] for p in self.active_positions) / total_size
-                
-                # Trailing Stop Logic
-                # Activate if price > entry * (1 + activation)
-                if self.trailing_high > avg_entry * (1 + self.trailing_stop_activation_pct):
-                    # Sell if price < high * (1 - callback)
-                    if current_price < self.trailing_high * (1 - self.trailing_stop_callback_pct):
-                        return Signal("sell", size=portfolio.quantity, reason="Trailing Stop Hit")
-
-        # Sell if Price > SMA * (1 + buffer) (Mean Reversion + Profit)
-        # Only if trailing stop hasn't kicked in (or maybe this is a backup target)
-        # Let's make this target very high so trailing stop takes precedence usually
-        if deviation > self.take_profit_above_sma_pct and portfolio.quantity > 0:
-             # Sell everything
-             return Signal("sell", size=portfolio.quantity, reason="Mean Reversion: Target Hit")
-
-        # 2. Check Buys (Grid Entry)
-        # Only buy if deviation is negative (Price < SMA)
-        if deviation < 0:
-            # Calculate which level we are in
-            # Level 1: -2% to -4%
-            # Level 2: -4% to -6%
-            # etc.
-            level_idx = int(abs(deviation) / self.grid_step_pct)
-            
-            if level_idx < 1:
-                return Signal("hold") # Between 0% and -2%, do nothing (dead zone)
-            
-            if level_idx > self.max_grid_levels:
-                level_idx = self.max_grid_levels
-                
-            # Check if we have bought this level recently?
-            # Or check if we have enough exposure.
-            # Simple Grid: Buy if we don't have a position "near" this price.
-            
-            # Let's look at our active positions (tracked in on_trade)
-            # If we have a position within X% of current price, don't buy.
-            
-            for pos in self.active_positions:
-                price_diff_pct = abs(pos['price'] - current_price) / pos['price']
-                if price_diff_pct < (self.grid_step_pct * 0.5):
-                    return Signal("hold", reason="Position already exists at this level")
-            
-            # Check Max Exposure (Contest Rule: Max 55%)
-            total_equity = portfolio.cash + (portfolio.quantity * current_price)
-            current_exposure = (portfolio.quantity * current_price) / total_equity
-            
-            if current_exposure >= 0.55:
-                return Signal("hold", reason="Max exposure reached")
-                
-            # Buy
-            # Size: 10% of Equity?
-            buy_amount_usd = total_equity * self.position_size_pct
-            if portfolio.cash < buy_amount_usd:
-                buy_amount_usd = portfolio.cash
-                
-            if buy_amount_usd < 10: # Min trade size
-                 return Signal("hold", reason="Insufficient cash")
-                 
-            size = buy_amount_usd / current_price
-            return Signal("buy", size=size, reason=f"Grid Buy Level {level_idx}")
-
-        return Signal("hold")
+        sma = market.sma
+        # Backtests precompute the SMA series; live feeds only supply prices
+        if sma is None:
+            ma_period = self.ma_period
+            if len(market.prices) < ma_period:
+                return HOLD, 0.0, _NO_REASON, 0
+            sma = statistics.mean(market.prices[-ma_period:])
+        if math.isnan(sma):
+            return HOLD, 0.0, _NO_REASON, 0  # Still inside the rolling-window warmup
+        action, size, reason, level_idx, self.trailing_high = _step(
+            float(current_price), float(sma), float(portfolio.cash), float(portfolio.quantity),
+            float(self.trailing_high), self.pos_prices, self.n_pos, self._total_size, self._weighted_sum,
+            *self._step_params,
+        )
+        return action, size, reason, level_idx
+
+    @staticmethod
+    def _to_signal(action: int, size: float, reason: int, level_idx: int) -> Signal:
+        if action == BUY:
+            return Signal("buy", size=size, reason=f"{_REASONS[reason]} {level_idx}")
+        if action == SELL:
+            return Signal("sell", size=size, reason=_REASONS[reason])
+        return Signal("hold", reason=_REASONS[reason])
 
     def on_trade(self, signal: Signal, execution_price: float, execution_size: float, timestamp: datetime) -> None:
         if signal.action == "buy":
-            self.active_positions.append({'price': execution_price, 'size': execution_size})
+            self._add_position(execution_price, execution_size)
         elif signal.action == "sell":
             # Clear positions on full sell
-            self.active_positions = []
+            self._clear_positions()
+
+    def _add_position(self, price: float, size: float) -> None:
+        if self.n_pos == len(self.pos_prices):
+            # Exposure cap normally keeps us well inside the buffer; grow if not
+            self.pos_prices = np.concatenate([self.pos_prices, np.zeros_like(self.pos_prices)])
+            self.pos_sizes = np.concatenate([self.pos_sizes, np.zeros_like(self.pos_sizes)])
+        self.pos_prices[self.n_pos] = price
+        self.pos_sizes[self.n_pos] = size
+        self.n_pos += 1
+        self._total_size += size
+        self._weighted_sum += price * size
+
+    def _clear_positions(self) -> None:
+        self.n_pos = 0
+        self._total_size = 0.0
+        self._weighted_sum = 0.0
+
+    @property
+    def active_positions(self) -> List[Dict[str, float]]:
+        """Open positions as a list of {'price', 'size'} dicts."""
+        return [
+            {'price': float(price), 'size': float(size)}
+            for price, size in zip(self.pos_prices[:self.n_pos], self.pos_sizes[:self.n_pos])
+        ]
 
     def get_state(self) -> Dict[str, Any]:
         """Save state to database/disk for crash recovery."""
@@ -146,7 +243,9 @@ class SwingReversionStrategy(BaseStrategy):
 
     def set_state(self, state: Dict[str, Any]) -> None:
         """Restore state after restart."""
-        self.active_positions = state.get("active_positions", [])
+        self._clear_positions()
+        for pos in state.get("active_positions", []):
+            self._add_position(pos['price'], pos['size'])
         self.trailing_high = state.get("trailing_high", 0.0)
 
 # Register